@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from profiler import COUNTERS
+from scenes import SCENES
+from world import World
+
+QUICK = ("demo", "wire-100", "rectangle-12x9", "circle-60", "pile-1000")
+# cold start probes, each run in a fresh interpreter: name -> (setup, timed code, budget in ms)
+# a probe times only its own code, so the core is budgeted on top of numpy instead of including it.
+# budgets are the measured medians (core 19, demo 24 ms) plus the ~30% a busy machine adds, checked
+# against the fastest run, which other processes disturb the least
+STARTUP = {
+    "numpy": ("", "import numpy", None),
+    "core": ("import numpy", "import world, physics, scenes", 30),
+    "demo": ("import numpy\nfrom scenes import SCENES\nfrom world import World",
+             "bounds, scene = SCENES['demo']\nworld = World(bounds)\nscene(world, 0)\nworld.step(1 / 60)", 35),
+}
+# headless workers must not pay for pygame
+HEADLESS = "\nimport sys\nassert 'pygame' not in sys.modules, 'pygame was imported'"
+
+
+def build(name: str, seed: int, **options):
+    bounds, scene = SCENES[name]
+    world = World(bounds, **options)
+    scene(world, seed)
+    return world
+
+
+def run(name: str, ticks: int, warmup: int, seed: int, deltatime: float, memory: bool, **options):
+    world = build(name, seed, **options)
+    for _ in range(warmup):
+        world.step(deltatime)
+    world.profiler.reset(ticks)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        world.step(deltatime)
+        world.profiler.frame()
+    elapsed = time.perf_counter() - start
+    result = {
+        "bodys": len(world.bodys),
+        "springs": len(world.springs),
+        "ticks": ticks,
+        "seconds": elapsed,
+        "steps_per_second": ticks / elapsed,
+        "phases": {name: stat["mean"] for name, stat in world.profiler.stats().items()},
+    }
+    if memory:
+        # measured in a separate pass so tracing does not skew the timings
+        tracemalloc.start()
+        world = build(name, seed, **options)
+        for _ in range(min(ticks, 50)):
+            world.step(deltatime)
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def startup(name: str, runs: int):
+    setup, code, budget = STARTUP[name]
+    source = f"{setup}\nimport time\nstart = time.perf_counter()\n{code}\nprint(time.perf_counter() - start){HEADLESS}"
+    times, processes = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", source], check=True, capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        processes.append(time.perf_counter() - start)
+        times.append(float(output))
+    return {"seconds": min(times), "median": float(np.median(times)), "budget": budget and budget / 1000,
+            "process": float(np.median(processes))}
+
+
+def over(result: dict):
+    return result["budget"] is not None and result["seconds"] > result["budget"]
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "processor": platform.processor()}
+
+
+def compare_startup(results: dict, baseline: dict):
+    print(f"\n{'probe':<18}{'before':>12}{'after':>12}{'speedup':>10}")
+    for name, result in results.items():
+        if name not in baseline.get("startup", {}):
+            continue
+        before = baseline["startup"][name]["seconds"] * 1000
+        after = result["seconds"] * 1000
+        print(f"{name:<18}{before:>10.1f}ms{after:>10.1f}ms{before / after:>9.2f}x")
+
+
+def compare(results: dict, baseline: dict):
+    print(f"\n{'scene':<18}{'before':>12}{'after':>12}{'speedup':>10}")
+    for name, result in results.items():
+        if name not in baseline["scenes"]:
+            continue
+        before = baseline["scenes"][name]["steps_per_second"]
+        after = result["steps_per_second"]
+        print(f"{name:<18}{before:>12.1f}{after:>12.1f}{after / before:>9.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless physics benchmarks")
+    parser.add_argument("scenes", nargs="*", help=f"scenes to run (default: all): {', '.join(SCENES)}")
+    parser.add_argument("--quick", action="store_true", help="run the small scenes only")
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--deltatime", type=float, default=1 / 60)
+    parser.add_argument("--broadphase", default="grid")
+    parser.add_argument("--backend", default="numpy", help="numpy or numba")
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--startup", action="store_true", help="measure cold start times against their budgets")
+    parser.add_argument("--runs", type=int, default=10, help="interpreters started per startup probe")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+    if args.startup:
+        return main_startup(args)
+
+    names = args.scenes or (QUICK if args.quick else list(SCENES))
+    results = {}
+    print(f"{'scene':<18}{'bodys':>7}{'steps/s':>10}{'ms/step':>9}{'peak MB':>9}  slowest phases")
+    for name in names:
+        result = run(name, args.ticks, args.warmup, args.seed, args.deltatime, args.memory,
+                     broadphase=args.broadphase, backend=args.backend)
+        results[name] = result
+        phases = sorted(((value, phase) for phase, value in result["phases"].items()
+                         if phase not in COUNTERS + ("frame",)), reverse=True)[:3]
+        slowest = ", ".join(f"{phase} {value * 1000:.2f}ms" for value, phase in phases)
+        memory = result.get("peak_memory", 0) / 2 ** 20
+        print(f"{name:<18}{result['bodys']:>7}{result['steps_per_second']:>10.1f}"
+              f"{1000 / result['steps_per_second']:>9.2f}{memory:>9.1f}  {slowest}")
+        sys.stdout.flush()
+
+    report = {"environment": environment(), "options": vars(args), "scenes": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+
+def main_startup(args):
+    results = {}
+    print(f"{'probe':<18}{'min ms':>9}{'median':>9}{'budget':>9}{'process':>9}")
+    for name in STARTUP:
+        result = startup(name, args.runs)
+        results[name] = result
+        budget = f"{result['budget'] * 1000:>9.0f}" if result["budget"] else f"{'-':>9}"
+        print(f"{name:<18}{result['seconds'] * 1000:>9.1f}{result['median'] * 1000:>9.1f}{budget}"
+              f"{result['process'] * 1000:>9.1f}{'  over budget' if over(result) else ''}")
+        sys.stdout.flush()
+
+    report = {"environment": environment(), "options": vars(args), "startup": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare_startup(results, json.load(file))
+    if any(over(result) for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    import pygame
+
+NO_PAIRS = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp))
+
+
+def overlapping_pairs(a: np.ndarray, b: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+    # one axis at a time on 1-d columns, much cheaper than comparing rows
+    keep = (lo[:, 0][a] <= hi[:, 0][b]) & (lo[:, 0][b] <= hi[:, 0][a])
+    a, b = a[keep], b[keep]
+    keep = (a != b) & (lo[:, 1][a] <= hi[:, 1][b]) & (lo[:, 1][b] <= hi[:, 1][a])
+    a, b = a[keep], b[keep]
+    if len(a) == 0:
+        return NO_PAIRS
+    a, b = np.minimum(a, b), np.maximum(a, b)
+    key = np.unique(a * len(lo) + b)
+    return key // len(lo), key % len(lo)
+
+
+def cells(lo: np.ndarray, hi: np.ndarray, size: float):
+    # every grid cell each box touches, as (hashed cell key, box index)
+    first = np.floor(lo / size).astype(np.int64)
+    span = np.floor(hi / size).astype(np.int64) - first + 1
+    counts = span[:, 0] * span[:, 1]
+    owner = np.repeat(np.arange(len(lo)), counts)
+    k = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    width = span[owner, 0]
+    cx = first[owner, 0] + k % width
+    cy = first[owner, 1] + k // width
+    return (cx << 32) ^ (cy & 0xFFFFFFFF), owner
+
+
+class Selection:
+    # a subset of the particles, renumbered from 0, for a broadphase to index
+    def __init__(self, lo: np.ndarray, hi: np.ndarray):
+        self.count = len(lo)
+        self.lo = lo
+        self.hi = hi
+
+    def bounds(self):
+        return self.lo, self.hi
+
+
+class StaticIndex:
+    # bodies that do not move, hashed into a sorted grid that is rebuilt only when they change
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.intp)
+        self.lo = np.zeros((0, 2))
+        self.hi = np.zeros((0, 2))
+        self.size = 1
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.owner = np.zeros(0, dtype=np.intp)
+        self.builds = 0
+
+    def update(self, ids: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+        if np.array_equal(ids, self.ids) and np.array_equal(lo, self.lo) and np.array_equal(hi, self.hi):
+            return
+        self.ids, self.lo, self.hi = ids, lo, hi
+        self.size = max(float((hi - lo).max()) if len(ids) else 0, 1)
+        keys, owner = cells(lo, hi, self.size)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.owner = owner[order]
+        self.builds += 1
+
+    def query(self, ids: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+        if len(self.ids) == 0 or len(ids) == 0:
+            return NO_PAIRS
+        keys, owner = cells(lo, hi, self.size)
+        start = np.searchsorted(self.keys, keys, side="left")
+        counts = np.searchsorted(self.keys, keys, side="right") - start
+        a = np.repeat(owner, counts)
+        b = self.owner[np.arange(len(a)) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(start, counts)]
+        keep = (lo[:, 0][a] <= self.hi[:, 0][b]) & (self.lo[:, 0][b] <= hi[:, 0][a]) & \
+            (lo[:, 1][a] <= self.hi[:, 1][b]) & (self.lo[:, 1][b] <= hi[:, 1][a])
+        if not keep.any():
+            return NO_PAIRS
+        # a pair sharing several cells is found once per cell
+        key = np.unique(a[keep] * len(self.ids) + b[keep])
+        return ids[key // len(self.ids)], self.ids[key % len(self.ids)]
+
+
+class UniformGrid:
+    def __init__(self, boundary: tuple, cell_size: float = None):
+        self.boundary = tuple(map(int, boundary))
+        self.cell_size = cell_size
+        self.color = (0, 0, 0)
+        self.lo = np.zeros((0, 2))
+        self.hi = np.zeros((0, 2))
+
+    def update(self, particles):
+        self.lo, self.hi = particles.bounds()
+
+    def pairs(self):
+        n = len(self.lo)
+        if n < 2:
+            return NO_PAIRS
+        size = self.cell_size or max(float((self.hi - self.lo).max()), 1)
+        key, owner = cells(self.lo, self.hi, size)
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        owner = owner[order]
+
+        a, b = [], []
+        d = 1
+        while d < len(key):
+            same = key[d:] == key[:-d]
+            if not same.any():
+                break
+            a.append(owner[:-d][same])
+            b.append(owner[d:][same])
+            d += 1
+        if not a:
+            return NO_PAIRS
+        return overlapping_pairs(np.concatenate(a), np.concatenate(b), self.lo, self.hi)
+
+    def clear(self):
+        pass
+
+    def draw(self, screen: 'pygame.Surface'):
+        import pygame
+        if not self.cell_size:
+            return
+        x, y, w, h = self.boundary
+        for cx in np.arange(x, x + w, self.cell_size):
+            pygame.draw.line(screen, self.color, (cx, y), (cx, y + h))
+        for cy in np.arange(y, y + h, self.cell_size):
+            pygame.draw.line(screen, self.color, (x, cy), (x + w, cy))
+
+
+class SweepAndPrune:
+    def __init__(self, boundary: tuple):
+        self.boundary = tuple(map(int, boundary))
+        self.order = np.zeros(0, dtype=np.intp)
+        self.lo = np.zeros((0, 2))
+        self.hi = np.zeros((0, 2))
+
+    def update(self, particles):
+        self.lo, self.hi = particles.bounds()
+        if len(self.order) != len(self.lo):
+            self.order = np.arange(len(self.lo))
+        # the previous order is almost sorted, which the stable sort exploits
+        self.order = self.order[np.argsort(
+            self.lo[self.order, 0], kind="stable")]
+
+    def pairs(self):
+        n = len(self.lo)
+        if n < 2:
+            return NO_PAIRS
+        lo = self.lo[self.order]
+        hi = self.hi[self.order]
+        start = np.arange(1, n + 1)
+        counts = np.searchsorted(lo[:, 0], hi[:, 0], side="right") - start
+        counts = np.maximum(counts, 0)
+        a = np.repeat(np.arange(n), counts)
+        b = np.arange(len(a)) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(start, counts)
+        return overlapping_pairs(self.order[a], self.order[b], self.lo, self.hi)
+
+    def clear(self):
+        self.order = np.zeros(0, dtype=np.intp)
+
+    def draw(self, screen: 'pygame.Surface'):
+        pass
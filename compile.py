@@ -6,7 +6,8 @@ import time
 def main():
     os.system("cls")
     now = time.time()
-    os.system("pyinstaller --onefile main.py")
+    # onedir starts faster than onefile, which unpacks itself to a temporary folder on every launch
+    os.system("pyinstaller --onedir --noconfirm main.py")
     shutil.rmtree("build")
     os.remove("main.spec")
     print(f"Compiled in {round(time.time() - now, 2)} seconds")
@@ -1,13 +1,24 @@
-import pygame
 import math
-from pygame.math import Vector2
+from vector import Vector2
 
-BACKGROUND_COLOR = pygame.color.Color("darkslategray")
-QUAD_CAPACITY = 1
+BACKGROUND_COLOR = (47, 79, 79)  # darkslategray
+QUAD_CAPACITY = 4
+QUAD_MAX_DEPTH = 8
+SOLVER_ITERATIONS = 4
+TICK_RATE = 60
+SUBSTEPS = 1
+MAX_CATCH_UP_STEPS = 5
+SLEEP_SPEED = 8
+SLEEP_DRIFT = 2
+SLEEP_TICKS = 60
+SLEEP_MARGIN = 1
+CCD_TRAVEL = 0.5  # fraction of its radius a body may move in one step before it is swept
 G = Vector2(0, 9.81)
 AIR_VISCOSITY = .148e-4
 AIR_K = 6 * math.pi * AIR_VISCOSITY
 MAX_TRAJECTORY_POINTS = 199
+TRAJECTORY_STEP = 0.01
+TRAJECTORY_TOLERANCE = 0.5
 R = 8.314  # gas constant
 OSSIGEN_MOLAR_MASS = 15.9994e-3  # kg/mol
 LEAD_MOLAR_MASS = 207.2e-3  # kg/mol
\ No newline at end of file
@@ -0,0 +1,107 @@
+import glob
+import os
+import queue
+import threading
+import numpy as np
+from constants import G
+
+FIELDS = ("position", "velocity", "energy")
+
+
+def energy(mass: np.ndarray, position: np.ndarray, velocity: np.ndarray, floor: float):
+    # kinetic plus potential energy above the floor, gravity points down the screen
+    return 0.5 * mass * (velocity ** 2).sum(axis=1) + mass * G.y * (floor - position[:, 1])
+
+
+class Exporter:
+    def __init__(self, directory: str, every: int = 1, fields: tuple = FIELDS, chunk: int = 256,
+                 backlog: int = 64):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.every = every
+        self.fields = tuple(fields)
+        self.chunk = chunk
+        self.tick = 0
+        self.dropped = 0
+        self.chunks = len(glob.glob(os.path.join(directory, "chunk-*.npz")))
+        # bounded, so a slow disk drops frames instead of growing memory or stalling the step loop
+        self.queue = queue.Queue(backlog)
+        self.thread = threading.Thread(target=self.write, daemon=True)
+        self.thread.start()
+
+    def record(self, world):
+        tick = self.tick
+        self.tick += 1
+        if tick % self.every:
+            return
+        particles = world.particles
+        n = particles.count
+        frame = {"tick": tick, "floor": world.bounds[1],
+                 "position": particles.position[:n].copy(), "velocity": particles.velocity[:n].copy(),
+                 "mass": particles.mass[:n].copy(), "handle": particles.handle[:n].copy(),
+                 "soft_bodys": [(softbody.indices(), getattr(softbody, "area", None),
+                                 getattr(softbody, "pressure", None))
+                                for softbody in world.soft_bodys]}
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+
+    def summarize(self, frame: dict):
+        rows = {"tick": frame["tick"], "count": len(frame["position"]), "handle": frame["handle"]}
+        if "position" in self.fields:
+            rows["position"] = frame["position"]
+        if "velocity" in self.fields:
+            rows["velocity"] = frame["velocity"]
+        if "energy" in self.fields:
+            rows["energy"] = energy(frame["mass"], frame["position"], frame["velocity"], frame["floor"])
+        soft = []
+        for i, (members, surface, pressure) in enumerate(frame["soft_bodys"]):
+            if len(members) == 0:
+                continue
+            points = frame["position"][members]
+            # only pressured bodies have an outline, the members of the others are not a polygon
+            soft.append((frame["tick"], i, *points.mean(axis=0), np.nan if surface is None else surface,
+                         np.nan if pressure is None else pressure))
+        rows["soft_bodys"] = np.array(soft).reshape(-1, 6)
+        return rows
+
+    def write(self):
+        pending = []
+        while True:
+            frame = self.queue.get()
+            if frame is not None:
+                pending.append(self.summarize(frame))
+            if pending and (frame is None or len(pending) >= self.chunk):
+                self.flush(pending)
+                pending = []
+            if frame is None:
+                return
+
+    def flush(self, rows: list):
+        arrays = {"tick": np.array([row["tick"] for row in rows]),
+                  "count": np.array([row["count"] for row in rows]),
+                  "handle": np.concatenate([row["handle"] for row in rows]),
+                  "soft_bodys": np.concatenate([row["soft_bodys"] for row in rows])}
+        for name in self.fields:
+            arrays[name] = np.concatenate([row[name] for row in rows])
+        path = os.path.join(self.directory, f"chunk-{self.chunks:05d}.npz")
+        # write then rename, so readers never see a half written chunk
+        with open(path + ".tmp", "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(path + ".tmp", path)
+        self.chunks += 1
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+def load(directory: str):
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(directory, "chunk-*.npz"))):
+        with np.load(path) as data:
+            chunks.append(dict(data))
+    if not chunks:
+        return {}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
@@ -0,0 +1,19 @@
+import numpy as np
+
+
+def components(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # connected components by hooking roots onto the smaller label, then pointer jumping
+    label = np.arange(n)
+    while True:
+        la, lb = label[a], label[b]
+        differ = la != lb
+        if not differ.any():
+            return label
+        la, lb = la[differ], lb[differ]
+        np.minimum.at(label, la, lb)
+        np.minimum.at(label, lb, la)
+        while True:
+            parent = label[label]
+            if np.array_equal(parent, label):
+                break
+            label = parent
@@ -0,0 +1,167 @@
+import numpy as np
+from particles import ParticleStore, GRAVITY
+from network import SpringNetwork
+from constants import AIR_K, TICK_RATE
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+AVAILABLE = njit is not None
+
+
+def jit(function):
+    # without numba the kernels still run, as plain python loops
+    return njit(cache=True)(function) if AVAILABLE else function
+
+
+# the kernels repeat the numpy path operation for operation, so both give the same bits
+
+@jit
+def integrate_kernel(position, velocity, radius, elasticity, static, deltatime, bounds, gravity, k):
+    for i in range(len(position)):
+        if static[i]:
+            continue
+        for d in range(2):
+            position[i, d] += velocity[i, d] * deltatime
+            velocity[i, d] += gravity[d] * deltatime
+        for d in range(2):
+            upper = bounds[d] - radius[i]
+            p = position[i, d]
+            if p > upper:
+                position[i, d] = upper
+            if p < radius[i]:
+                position[i, d] = radius[i]
+            if p > upper or p < radius[i]:
+                velocity[i, d] *= -elasticity[i]
+        for d in range(2):
+            velocity[i, d] -= k * radius[i] * velocity[i, d] * deltatime
+
+
+@jit
+def contacts_kernel(position, velocity, weight, radius, elasticity, a, b, iterations):
+    n = len(position)
+    m = len(a)
+    total = np.empty(m)
+    reach = np.empty(m)
+    restitution = np.empty(m)
+    moving = np.zeros(m, dtype=np.bool_)
+    for p in range(m):
+        total[p] = weight[a[p]] + weight[b[p]]
+        moving[p] = total[p] > 0
+        reach[p] = radius[a[p]] + radius[b[p]]
+        restitution[p] = 1 + min(elasticity[a[p]], elasticity[b[p]])
+
+    contacts = 0
+    normal = np.empty((m, 2))
+    distance = np.empty(m)
+    touching = np.zeros(m, dtype=np.bool_)
+    shared = np.zeros(n, dtype=np.int64)
+    acc = np.zeros((n, 2))
+    for _ in range(iterations):
+        found = 0
+        shared[:] = 0
+        for p in range(m):
+            touching[p] = False
+            if not moving[p]:
+                continue
+            dx = position[a[p], 0] - position[b[p], 0]
+            dy = position[a[p], 1] - position[b[p], 1]
+            distance[p] = np.hypot(dx, dy)
+            if distance[p] < reach[p] and distance[p] > 0:
+                touching[p] = True
+                normal[p, 0] = dx / distance[p]
+                normal[p, 1] = dy / distance[p]
+                shared[a[p]] += 1
+                shared[b[p]] += 1
+                found += 1
+        if found == 0:
+            break
+        if contacts == 0:
+            contacts = found
+
+        for side in range(2):
+            acc[:] = 0
+            for p in range(m):
+                if touching[p]:
+                    i = a[p] if side == 0 else b[p]
+                    w = weight[i] / shared[i]
+                    depth = (reach[p] - distance[p]) / total[p]
+                    for d in range(2):
+                        correction = normal[p, d] * depth
+                        acc[i, d] += (correction if side == 0 else -correction) * w
+            position += acc
+
+        j = np.empty(m)
+        for p in range(m):
+            if touching[p]:
+                approach = (velocity[a[p], 0] - velocity[b[p], 0]) * normal[p, 0] + \
+                    (velocity[a[p], 1] - velocity[b[p], 1]) * normal[p, 1]
+                approach = min(approach, 0.0)
+                j[p] = -restitution[p] * approach / total[p]
+        for side in range(2):
+            acc[:] = 0
+            for p in range(m):
+                if touching[p]:
+                    i = a[p] if side == 0 else b[p]
+                    w = weight[i] / shared[i]
+                    for d in range(2):
+                        impulse = normal[p, d] * j[p]
+                        acc[i, d] += (impulse if side == 0 else -impulse) * w
+            velocity += acc
+    return contacts
+
+
+@jit
+def impulses_kernel(position, velocity, radius, static, a, b, length, strength, damping, deltatime, tick_rate):
+    n = len(position)
+    m = len(a)
+    stretch = np.empty(m)
+    valid = np.empty(m, dtype=np.bool_)
+    acc_a = np.zeros((n, 2))
+    acc_b = np.zeros((n, 2))
+    for e in range(m):
+        i, j = a[e], b[e]
+        dx = position[j, 0] - position[i, 0]
+        dy = position[j, 1] - position[i, 1]
+        distance = np.hypot(dx, dy)
+        valid[e] = distance > 0
+        stretch[e] = distance - radius[i] - radius[j] - length[e]
+        if not valid[e]:
+            continue
+        magnitude = stretch[e] * strength[e] * deltatime * tick_rate
+        drag = damping[e] * deltatime
+        for d, delta in enumerate((dx, dy)):
+            force = delta / distance * magnitude
+            if not static[i]:
+                acc_a[i, d] += force - velocity[i, d] * drag
+            if not static[j]:
+                acc_b[j, d] += -force - velocity[j, d] * drag
+    velocity += acc_a
+    velocity += acc_b
+    return stretch, valid
+
+
+def resolve_contacts(particles, a: np.ndarray, b: np.ndarray, iterations: int = 1) -> int:
+    if len(a) == 0:
+        return 0
+    n = particles.count
+    weight = np.where(particles.static[:n], 0, particles.inv_mass[:n])
+    return contacts_kernel(particles.position[:n], particles.velocity[:n], weight, particles.radius[:n],
+                           particles.elasticity[:n], a, b, iterations)
+
+
+class JitParticleStore(ParticleStore):
+    def update(self, deltatime: float, bounds: tuple):
+        n = self.count
+        integrate_kernel(self.position[:n], self.velocity[:n], self.radius[:n], self.elasticity[:n],
+                         self.static[:n] | self.asleep[:n], deltatime, np.asarray(bounds, dtype=float), GRAVITY, AIR_K)
+
+
+class JitSpringNetwork(SpringNetwork):
+    def impulses(self, particles, edges: np.ndarray, deltatime: float):
+        n = particles.count
+        return impulses_kernel(particles.position[:n], particles.velocity[:n], particles.radius[:n],
+                               particles.static[:n], self.a[edges], self.b[edges], self.length[edges],
+                               self.strength[edges], self.damping[edges], deltatime, TICK_RATE)
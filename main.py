@@ -1,64 +1,109 @@
+import argparse
+import os
 import pygame
-from physics import *
-import random
-from quadtree import QuadTree
-from constants import QUAD_CAPACITY, BACKGROUND_COLOR
+from vector import Vector2
+from physics import Body
+from scenes import SCENES
+from world import World
+from renderer import Renderer
+from constants import SOLVER_ITERATIONS, TICK_RATE, SUBSTEPS, MAX_CATCH_UP_STEPS
 
 
 class App:
-    def __init__(self, i_wsx=1300, i_wsy=700):
+    def __init__(self, i_wsx=1300, i_wsy=700, broadphase: str = "grid", solver_iterations: int = SOLVER_ITERATIONS,
+                 fixed_deltatime: float = 1 / TICK_RATE, substeps: int = SUBSTEPS, max_steps: int = MAX_CATCH_UP_STEPS,
+                 interpolate: bool = True, record: str = None, export: str = None, export_every: int = 1,
+                 scene="demo", seed: int = 0, **broadphase_options):
         pygame.init()
         self.screen = pygame.display.set_mode(
             (i_wsx, i_wsy), pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
         self.clock = pygame.time.Clock()
-        self.bodys = []
-        self.springs = []
-        self.bonds = []
-        self.soft_bodys = []
-        self.temperature = 90
+        self.renderer = Renderer()
+        self.font = pygame.font.SysFont("monospace", 14)
+        self.show_profile = False
+        self.world = World((i_wsx, i_wsy), broadphase,
+                           solver_iterations, **broadphase_options)
+        self.fixed_deltatime = fixed_deltatime
+        self.substeps = substeps
+        self.max_steps = max_steps
+        self.interpolate = interpolate
+        self.accumulator = 0
+        # a scene name from scenes.SCENES, a callable taking (world, seed), or None for an empty world
+        self.scene = scene
+        self.seed = seed
+        self.recorder = None
+        if record:
+            import snapshot
+            self.recorder = snapshot.Recorder(record)
+        self.exporter = None
+        if export:
+            from export import Exporter
+            self.exporter = Exporter(export, export_every)
 
-        self.soft_bodys.append(Wire(self, Vector2(100, 200), Vector2(400, 300), 30))
+    def populate(self):
+        scene = SCENES[self.scene][1] if isinstance(self.scene, str) else self.scene
+        if scene is not None:
+            scene(self.world, self.seed)
 
-        self.soft_bodys.append(RectangleSoftBody(self, Vector2(800, 300), 300, 200, (12, 9)))
+    def controls(self):
+        mouse_pressed = pygame.mouse.get_pressed()
+        key_pressed = pygame.key.get_pressed()
+        if key_pressed[pygame.K_o]:
+            self.world.temperature += 1
+            self.world.wake()
+        if key_pressed[pygame.K_p]:
+            self.world.temperature -= 1
+            self.world.wake()
+        if not (mouse_pressed[2] or key_pressed[pygame.K_k]):
+            return
+        hit = self.world.bodys_at(pygame.mouse.get_pos())
+        if mouse_pressed[2]:
+            for i in hit[::-1].tolist():
+                self.world.remove_body(self.world.bodys[i])
+        else:
+            self.world.disturb(hit)
+            self.world.particles.static[hit] ^= True
 
-        self.soft_bodys.append(PressuredCircleSoftBody(self, Vector2(600, 300), 60, 60))
-
-        self.quad_tree = QuadTree(QUAD_CAPACITY, pygame.Rect(
-            0, 0, i_wsx, i_wsy), self.bodys)
-
-    def update(self, deltatime: float):
-        wsx, wsy = self.screen.get_size()
-        self.quad_tree = QuadTree(QUAD_CAPACITY, pygame.Rect(
-            0, 0, wsx, wsy), self.bodys)
-        for body in self.bodys:
-            body.update(deltatime)
-        for spring in self.springs:
-            spring.update(deltatime)
-        for bond in self.bonds:
-            bond.update(deltatime)
-        for softbody in self.soft_bodys:
-            softbody.update()
+    def step(self, frametime: float):
+        self.world.resize(self.screen.get_size())
+        self.accumulator += min(frametime, self.fixed_deltatime * self.max_steps)
+        steps = 0
+        while self.accumulator >= self.fixed_deltatime and steps < self.max_steps:
+            self.world.particles.save()
+            for _ in range(self.substeps):
+                self.world.step(self.fixed_deltatime / self.substeps)
+            if self.recorder:
+                self.recorder.record(self.world)
+            if self.exporter:
+                with self.world.profiler.section("export"):
+                    self.exporter.record(self.world)
+            self.accumulator -= self.fixed_deltatime
+            steps += 1
+        if steps == self.max_steps:
+            # drop the backlog instead of spiralling further behind
+            self.accumulator = min(self.accumulator, self.fixed_deltatime)
 
     def draw(self):
-        self.screen.fill(BACKGROUND_COLOR)
-        # self.quad_tree.draw(self.screen)
-        for body in self.bodys:
-            body.draw()
-        for spring in self.springs:
-            spring.draw()
-        for bond in self.bonds:
-            bond.draw()
-        for softbody in self.soft_bodys:
-            try:
-                softbody.draw()
-            except:
-                pass
+        alpha = self.accumulator / self.fixed_deltatime if self.interpolate else 1
+        positions = self.world.particles.interpolate(alpha)
+        with self.world.profiler.section("draw"):
+            self.renderer.draw(self.screen, self.world, positions)
+            # self.world.broadphase.draw(self.screen)
+        if self.show_profile:
+            self.world.profiler.draw(self.screen, self.font)
 
     def run(self):
+        # the window is already up, so building the scene does not delay it
+        pygame.display.flip()
+        self.populate()
         while 1:
-            deltatime = self.clock.tick(60) / 1000
+            frametime = self.clock.tick(TICK_RATE) / 1000
             for event in pygame.event.get():
                 if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    if self.recorder:
+                        self.recorder.close()
+                    if self.exporter:
+                        self.exporter.close()
                     pygame.quit()
                     exit()
                 elif event.type == pygame.VIDEORESIZE:
@@ -66,28 +111,41 @@ class App:
                         event.dict['size'], pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
-                        for body in self.bodys:
-                            body.velocity = Vector2(0, 0)
+                        self.world.particles.velocity[:] = 0
+                    elif event.key == pygame.K_F3:
+                        self.show_profile = not self.show_profile
+                    elif event.key == pygame.K_F4:
+                        self.world.profiler.export("profile.csv")
+                    elif event.key == pygame.K_F5:
+                        import snapshot
+                        snapshot.save(self.world, "snapshot.npz")
+                    elif event.key == pygame.K_F9 and os.path.exists("snapshot.npz"):
+                        import snapshot
+                        self.world = snapshot.load("snapshot.npz")
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:
-                        self.bodys.append(Body(self, Vector2(
-                            event.pos[0], event.pos[1]), 30, 20, 1))
+                        Body(self.world, Vector2(event.pos[0], event.pos[1]), 30, 20, 1)
                         
-            pressed = pygame.key.get_pressed()
-            if pressed[pygame.K_o]:
-                self.temperature += 1
-            if pressed[pygame.K_p]:
-                self.temperature -= 1
-            self.update(deltatime)
+            self.controls()
+            self.step(frametime)
             self.draw()
+            self.world.profiler.frame()
             fps = self.clock.get_fps()
             pygame.display.flip()
             pygame.display.set_caption(
-                f"fps: {str(round(fps, 2))} | bodys: {len(self.bodys)} | temperature: {self.temperature}")
+                f"fps: {str(round(fps, 2))} | bodys: {len(self.world.bodys)} | temperature: {self.world.temperature}")
 
 
-def main():
-    app = App()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interactive physics sandbox")
+    parser.add_argument("scene", nargs="?", default="demo", help=f"scene to start with: {', '.join(SCENES)}, or none")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--broadphase", default="grid")
+    parser.add_argument("--record", help="record every tick to this directory")
+    parser.add_argument("--export", help="stream simulation data to this directory")
+    args = parser.parse_args(argv)
+    app = App(broadphase=args.broadphase, record=args.record, export=args.export,
+              scene=None if args.scene == "none" else args.scene, seed=args.seed)
     app.run()
 
 
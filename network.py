@@ -0,0 +1,200 @@
+import numpy as np
+from solver import scatter_add
+from constants import TICK_RATE
+
+
+class EdgeNetwork:
+    fields = ("a", "b", "length", "show", "color")
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.edges = []
+        self.a = np.zeros(capacity, dtype=np.intp)
+        self.b = np.zeros(capacity, dtype=np.intp)
+        self.length = np.zeros(capacity)
+        self.show = np.ones(capacity, dtype=bool)
+        self.color = np.zeros(capacity, dtype=np.intp)
+        self.colors = 0
+        self.version = 0
+        self.links = {}
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        capacity = len(self.a) * 2
+        for name in self.fields:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, edge, a: int, b: int, length: float, **values) -> int:
+        if self.count == len(self.a):
+            self.grow()
+        i = self.count
+        self.a[i] = a
+        self.b[i] = b
+        self.length[i] = length
+        self.show[i] = values.pop("show", True)
+        for name, value in values.items():
+            getattr(self, name)[i] = value
+        self.edges.append(edge)
+        self.links.setdefault(edge.body1, {})[edge] = None
+        self.links.setdefault(edge.body2, {})[edge] = None
+        self.count += 1
+        self.colors = 0
+        self.version += 1
+        return i
+
+    def remove(self, i: int):
+        last = self.count - 1
+        edge = self.edges[i]
+        edge.index = -1
+        self.links.get(edge.body1, {}).pop(edge, None)
+        self.links.get(edge.body2, {}).pop(edge, None)
+        if i != last:
+            for name in self.fields:
+                array = getattr(self, name)
+                array[i] = array[last]
+            self.edges[i] = self.edges[last]
+            self.edges[i].index = i
+        self.edges.pop()
+        self.count = last
+        self.version += 1
+
+    def remove_body(self, body, moved, i: int, last: int):
+        removed = list(self.links.pop(body, ()))
+        for edge in removed:
+            self.remove(edge.index)
+        if moved is not body:
+            for edge in self.links.get(moved, ()):
+                if self.a[edge.index] == last:
+                    self.a[edge.index] = i
+                if self.b[edge.index] == last:
+                    self.b[edge.index] = i
+        self.version += 1
+        return removed
+
+    def state(self) -> dict:
+        state = {name: getattr(self, name)[:self.count] for name in self.fields}
+        # keep the colouring too, a repaint would reorder the batches
+        state["colors"] = np.array(self.colors)
+        return state
+
+    def load(self, state: dict, edges: list):
+        n = len(edges)
+        while len(self.a) < n:
+            self.grow()
+        for name in self.fields:
+            getattr(self, name)[:n] = state[name]
+        self.edges[:] = edges
+        self.links = {}
+        for edge in edges:
+            self.links.setdefault(edge.body1, {})[edge] = None
+            self.links.setdefault(edge.body2, {})[edge] = None
+        self.count = n
+        self.colors = int(state["colors"])
+        self.version += 1
+
+    def paint(self):
+        # greedy edge colouring: no body appears twice within one colour
+        used = {}
+        for edge, (a, b) in enumerate(zip(self.a[:self.count].tolist(), self.b[:self.count].tolist())):
+            taken = used.setdefault(a, set()) | used.setdefault(b, set())
+            color = 0
+            while color in taken:
+                color += 1
+            self.color[edge] = color
+            used[a].add(color)
+            used[b].add(color)
+        self.colors = int(self.color[:self.count].max()) + 1 if self.count else 0
+
+    def batches(self, edges: np.ndarray):
+        if not self.colors:
+            self.paint()
+        color = self.color[edges]
+        for c in range(self.colors):
+            batch = edges[color == c]
+            if len(batch):
+                yield batch
+
+    def awake(self, particles, edges: np.ndarray):
+        # a static end never moves either, so an edge between it and a sleeping body has nothing to do
+        n = particles.count
+        inactive = particles.asleep[:n] | particles.static[:n]
+        return edges[~(inactive[self.a[edges]] & inactive[self.b[edges]])]
+
+    def project(self, particles, edges: np.ndarray):
+        n = particles.count
+        position = particles.position[:n]
+        radius = particles.radius[:n]
+        dynamic = ~particles.static[:n, None]
+        a = self.a[edges]
+        b = self.b[edges]
+        delta = position[a] - position[b]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        valid = distance > 0
+        a, b, delta, distance = a[valid], b[valid], delta[valid], distance[valid]
+        direction = delta / distance[:, None]
+        centre = (position[a] + position[b]) / 2
+        half = self.length[edges][valid] / 2
+        target_a = centre + direction * (half + radius[a])[:, None]
+        target_b = centre - direction * (half + radius[b])[:, None]
+        position[a] = np.where(dynamic[a], target_a, position[a])
+        position[b] = np.where(dynamic[b], target_b, position[b])
+
+
+class SpringNetwork(EdgeNetwork):
+    fields = EdgeNetwork.fields + ("strength", "damping", "fixed")
+
+    def __init__(self, capacity: int = 64):
+        super().__init__(capacity)
+        self.strength = np.zeros(capacity)
+        self.damping = np.zeros(capacity)
+        self.fixed = np.zeros(capacity, dtype=bool)
+
+    def update(self, particles, deltatime: float):
+        edges = self.awake(particles, np.arange(self.count))
+        fixed = self.fixed[edges]
+        self.pull(particles, edges[~fixed], deltatime)
+        # fixed springs also move bodies, so they run in batches that share no body
+        for batch in self.batches(edges[fixed]):
+            self.pull(particles, batch, deltatime)
+
+    def pull(self, particles, edges: np.ndarray, deltatime: float):
+        if len(edges) == 0:
+            return
+        stretch, valid = self.impulses(particles, edges, deltatime)
+        radius = particles.radius
+        limit = np.minimum(radius[self.a[edges]], radius[self.b[edges]]) * deltatime
+        self.project(particles, edges[self.fixed[edges] & valid & (np.abs(stretch) >= limit)])
+
+    def impulses(self, particles, edges: np.ndarray, deltatime: float):
+        n = particles.count
+        a = self.a[edges]
+        b = self.b[edges]
+        position = particles.position[:n]
+        velocity = particles.velocity[:n]
+        radius = particles.radius[:n]
+        dynamic = ~particles.static[:n, None]
+        delta = position[b] - position[a]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        valid = distance > 0
+        direction = np.divide(delta, distance[:, None], out=np.zeros_like(delta), where=valid[:, None])
+        stretch = distance - radius[a] - radius[b] - self.length[edges]
+
+        # strengths are tuned as per-tick impulses at TICK_RATE
+        force = direction * (stretch * self.strength[edges] * deltatime * TICK_RATE)[:, None]
+        damping = (self.damping[edges] * deltatime)[:, None]
+        dv_a = (force - velocity[a] * damping) * (dynamic[a] & valid[:, None])
+        dv_b = (-force - velocity[b] * damping) * (dynamic[b] & valid[:, None])
+        scatter_add(velocity, a, dv_a)
+        scatter_add(velocity, b, dv_b)
+        return stretch, valid
+
+
+class BondNetwork(EdgeNetwork):
+    def update(self, particles):
+        for batch in self.batches(self.awake(particles, np.arange(self.count))):
+            self.project(particles, batch)
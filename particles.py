@@ -0,0 +1,177 @@
+import numpy as np
+from constants import G, AIR_K, MAX_TRAJECTORY_POINTS, TRAJECTORY_STEP
+
+GRAVITY = np.array((G.x, G.y))
+TRAJECTORY_TIMES = TRAJECTORY_STEP * np.arange(1, MAX_TRAJECTORY_POINTS + 2)[:, None]
+
+
+def trajectory(position: np.ndarray, velocity: np.ndarray, radius: float, floor: float, drag: bool = False):
+    t = TRAJECTORY_TIMES
+    k = AIR_K * radius
+    if drag and k > 0:
+        # closed form of dv/dt = g - k * v
+        terminal = GRAVITY / k
+        points = position + terminal * t + \
+            (velocity - terminal) * (1 - np.exp(-k * t)) / k
+    else:
+        points = position + velocity * t + GRAVITY * t * t / 2
+    below = np.flatnonzero(points[:, 1] > floor)
+    if len(below):
+        points = points[:below[0] + 1]
+    return points
+
+
+
+class ParticleStore:
+    fields = ("position", "previous", "velocity", "mass", "inv_mass", "radius", "elasticity", "static",
+              "show", "show_trajectory", "handle", "asleep", "rest", "island", "anchor", "ccd")
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self.bodys = []
+        self.position = np.zeros((capacity, 2))
+        self.previous = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.mass = np.ones(capacity)
+        self.inv_mass = np.ones(capacity)
+        self.radius = np.zeros(capacity)
+        self.elasticity = np.zeros(capacity)
+        self.static = np.zeros(capacity, dtype=bool)
+        self.show = np.ones(capacity, dtype=bool)
+        self.show_trajectory = np.zeros(capacity, dtype=bool)
+        self.handle = np.zeros(capacity, dtype=np.intp)
+        self.asleep = np.zeros(capacity, dtype=bool)
+        self.rest = np.zeros(capacity, dtype=np.intp)
+        self.island = np.zeros(capacity, dtype=np.intp)
+        self.anchor = np.zeros((capacity, 2))
+        self.ccd = np.zeros(capacity, dtype=bool)
+        self.slots = []
+        self.generations = []
+        self.free = []
+        self.version = 0
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        capacity = len(self.mass) * 2
+        for name in self.fields:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, body, position, mass: float, radius: float, elasticity: float, static: bool = False,
+            show: bool = True, show_trajectory: bool = False, ccd: bool = False) -> int:
+        if self.count == len(self.mass):
+            self.grow()
+        i = self.count
+        self.position[i] = position
+        self.previous[i] = position
+        self.velocity[i] = 0
+        self.mass[i] = mass
+        self.inv_mass[i] = 1 / mass
+        self.radius[i] = radius
+        self.elasticity[i] = elasticity
+        self.static[i] = static
+        self.show[i] = show
+        self.show_trajectory[i] = show_trajectory
+        self.asleep[i] = False
+        self.rest[i] = 0
+        self.ccd[i] = ccd
+        if self.free:
+            handle = self.free.pop()
+        else:
+            handle = len(self.slots)
+            self.slots.append(-1)
+            self.generations.append(0)
+        self.slots[handle] = i
+        self.handle[i] = handle
+        self.bodys.append(body)
+        self.count += 1
+        self.version += 1
+        return i
+
+    def key(self, i: int) -> tuple:
+        handle = self.handle[i].item()
+        return (handle, self.generations[handle])
+
+    def resolve(self, key: tuple) -> int:
+        handle, generation = key
+        if handle >= len(self.slots) or self.generations[handle] != generation:
+            return -1
+        return self.slots[handle]
+
+    def remove(self, i: int) -> int:
+        last = self.count - 1
+        handle = self.handle[i].item()
+        self.slots[handle] = -1
+        self.generations[handle] += 1
+        self.free.append(handle)
+        if i != last:
+            self.slots[self.handle[last]] = i
+            for name in self.fields:
+                array = getattr(self, name)
+                array[i] = array[last]
+            self.bodys[i] = self.bodys[last]
+            self.bodys[i].index = i
+        self.bodys.pop()
+        self.count = last
+        self.version += 1
+        return last
+
+    def reserve(self, capacity: int):
+        while len(self.mass) < capacity:
+            self.grow()
+
+    def state(self) -> dict:
+        state = {name: getattr(self, name)[:self.count] for name in self.fields}
+        state["slots"] = np.array(self.slots, dtype=np.intp)
+        state["generations"] = np.array(self.generations, dtype=np.intp)
+        state["free"] = np.array(self.free, dtype=np.intp)
+        return state
+
+    def load(self, state: dict, bodys: list):
+        n = len(bodys)
+        self.reserve(n)
+        for name in self.fields:
+            getattr(self, name)[:n] = state[name]
+        self.slots = state["slots"].tolist()
+        self.generations = state["generations"].tolist()
+        self.free = state["free"].tolist()
+        self.bodys[:] = bodys
+        self.count = n
+        self.version += 1
+
+    def save(self):
+        self.previous[:self.count] = self.position[:self.count]
+
+    def interpolate(self, alpha: float):
+        n = self.count
+        return self.previous[:n] + (self.position[:n] - self.previous[:n]) * alpha
+
+    def bounds(self):
+        n = self.count
+        radius = self.radius[:n, None]
+        return self.position[:n] - radius, self.position[:n] + radius
+
+    def update(self, deltatime: float, bounds: tuple):
+        # static and sleeping bodies are left out entirely
+        ids = np.flatnonzero(~(self.static[:self.count] | self.asleep[:self.count]))
+        position = self.position[ids]
+        velocity = self.velocity[ids]
+        radius = self.radius[ids, None]
+
+        position += velocity * deltatime
+        velocity += GRAVITY * deltatime
+
+        upper = np.asarray(bounds, dtype=float) - radius
+        low = position < radius
+        high = position > upper
+        np.copyto(position, upper, where=high)
+        np.copyto(position, np.broadcast_to(radius, position.shape), where=low)
+        velocity *= np.where(low | high, -self.elasticity[ids, None], 1)
+
+        velocity -= AIR_K * radius * velocity * deltatime
+        self.position[ids] = position
+        self.velocity[ids] = velocity
@@ -0,0 +1,82 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+PHASES = ("broadphase", "collision", "integration", "ccd", "springs", "bonds", "pressure", "sleep", "trajectory", "export", "draw")
+COUNTERS = ("pairs", "contacts", "impacts")
+
+
+class Profiler:
+    def __init__(self, window: int = 120, enabled: bool = True):
+        self.enabled = enabled
+        self.reset(window)
+
+    def reset(self, window: int = None):
+        self.history = deque(maxlen=window or self.history.maxlen)
+        self.current = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def timed(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[name] = self.current.get(name, 0) + time.perf_counter() - start
+
+    def section(self, name: str):
+        if not self.enabled:
+            return nullcontext()
+        return self.timed(name)
+
+    def count(self, name: str, value: int):
+        if self.enabled:
+            self.current[name] = self.current.get(name, 0) + value
+
+    def frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current["frame"] = now - self.started
+        self.started = now
+        self.history.append(self.current)
+        self.current = {}
+
+    def names(self):
+        names = [name for name in PHASES + COUNTERS + ("frame",)
+                 if any(name in row for row in self.history)]
+        extra = {name for row in self.history for name in row} - set(names)
+        return names + sorted(extra)
+
+    def stats(self):
+        stats = {}
+        for name in self.names():
+            values = [row.get(name, 0) for row in self.history]
+            stats[name] = {"mean": sum(values) / len(values), "min": min(values),
+                           "max": max(values), "last": values[-1]}
+        return stats
+
+    def export(self, path: str):
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump({"stats": self.stats(), "frames": list(self.history)}, file, indent=2)
+            return
+        names = self.names()
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(names)
+            for row in self.history:
+                writer.writerow([row.get(name, 0) for name in names])
+
+    def draw(self, screen, font, position: tuple = (10, 10)):
+        x, y = position
+        for name, stat in self.stats().items():
+            if name in COUNTERS:
+                text = f"{name}: {stat['mean']:.0f} (max {stat['max']:.0f})"
+            else:
+                text = f"{name}: {stat['mean'] * 1000:.2f} ms (max {stat['max'] * 1000:.2f})"
+            surface = font.render(text, True, (255, 255, 255))
+            screen.blit(surface, (x, y))
+            y += surface.get_height()
@@ -1,74 +1,212 @@
-import pygame
-from physics import Body
+from typing import TYPE_CHECKING
+import numpy as np
+from broadphase import overlapping_pairs, NO_PAIRS
+from constants import QUAD_CAPACITY, QUAD_MAX_DEPTH
+
+if TYPE_CHECKING:
+    import pygame
+
+UNBOUNDED = (-np.inf, -np.inf, np.inf, np.inf)
+LEAF = (np.nan, np.nan)
+
+
+class QuadNode:
+    def __init__(self):
+        self.reset(0, 0, 0, 0, 0, None, 0)
+
+    def reset(self, x: float, y: float, w: float, h: float, depth: int, parent: 'QuadNode', code: int):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.depth = depth
+        self.parent = parent
+        # the quadrants taken from the root, two bits per level
+        self.code = code
+        self.bodys = set()
+        self.count = 0
+        self.children = None
+
+    @property
+    def bounds(self):
+        return (self.x, self.y, self.x + self.w, self.y + self.h)
+
+    @property
+    def center(self):
+        return (self.x + self.w / 2, self.y + self.h / 2)
+
+    def contains(self, aabb: list):
+        return aabb[0] >= self.x and aabb[1] >= self.y and aabb[2] <= self.x + self.w and aabb[3] <= self.y + self.h
 
 
 class QuadTree:
-    def __init__(self, capacity: int, boundary: pygame.Rect, _bodys: list):
+    def __init__(self, boundary: tuple, capacity: int = QUAD_CAPACITY, max_depth: int = QUAD_MAX_DEPTH):
+        self.boundary = tuple(map(int, boundary))
         self.capacity = capacity
-        self.boundary = boundary
-        self.bodys = []
+        self.max_depth = max_depth
         self.color = (0, 0, 0)
+        self.pool = []
+        self.node_of = []
+        self.cell = np.zeros((0, 4))
+        self.mid = np.zeros((0, 2))
+        self.lo = np.zeros((0, 2))
+        self.hi = np.zeros((0, 2))
+        # preorder keys of each body's node and of the end of that node's subtree
+        self.key = np.zeros(0, dtype=np.int64)
+        self.end = np.zeros(0, dtype=np.int64)
+        # candidate pairs of the current layout, rebuilt only after a body changes node
+        self.candidates = None
+        self.root = self.node(*self.boundary, 0, None, 0)
+
+    def node(self, x: float, y: float, w: float, h: float, depth: int, parent: QuadNode, code: int):
+        node = self.pool.pop() if self.pool else QuadNode()
+        node.reset(x, y, w, h, depth, parent, code)
+        # the code padded to max_depth sorts nodes in preorder, the depth puts ancestors first
+        shift = 2 * (self.max_depth - depth)
+        node.key = (code << shift) * (self.max_depth + 1) + depth
+        node.end = ((code + 1) << shift) * (self.max_depth + 1)
+        return node
+
+    def update(self, particles):
+        n = particles.count
+        self.lo, self.hi = lo, hi = particles.bounds()
+        tracked = len(self.node_of)
+        if n > len(self.cell):
+            capacity = max(n, len(self.cell) * 2)
+            self.cell = np.resize(self.cell, (capacity, 4))
+            self.mid = np.resize(self.mid, (capacity, 2))
+            self.key = np.resize(self.key, capacity)
+            self.end = np.resize(self.end, capacity)
+
+        cell = self.cell[:tracked]
+        mid = self.mid[:tracked]
+        lo = lo[:tracked]
+        hi = hi[:tracked]
+        left = (lo < cell[:, :2]).any(axis=1) | (hi > cell[:, 2:]).any(axis=1)
+        fits = ((hi <= mid) | (lo >= mid)).all(axis=1)
+        for i in np.flatnonzero(left | fits).tolist():
+            self.relocate(i)
+        for i in range(tracked, n):
+            self.node_of.append(None)
+            self.insert(self.root, i)
+
+    def relocate(self, i: int):
+        old = self.node_of[i]
+        self.detach(i)
+        aabb = self.aabb(i)
+        node = old
+        while node.parent is not None and not node.contains(aabb):
+            node = node.parent
+        self.insert(node, i)
+        self.merge(old)
+
+    def aabb(self, i: int):
+        return self.lo[i].tolist() + self.hi[i].tolist()
+
+    def insert(self, node: QuadNode, i: int):
+        aabb = self.aabb(i)
+        parent = node.parent
+        while parent is not None:
+            parent.count += 1
+            parent = parent.parent
+        while True:
+            node.count += 1
+            if node.children is None:
+                self.store(node, i)
+                if len(node.bodys) > self.capacity and node.depth < self.max_depth:
+                    self.subdivide(node)
+                return
+            for child in node.children:
+                if child.contains(aabb):
+                    node = child
+                    break
+            else:
+                self.store(node, i)
+                return
+
+    def store(self, node: QuadNode, i: int):
+        node.bodys.add(i)
+        self.node_of[i] = node
+        self.key[i] = node.key
+        self.end[i] = node.end
+        self.candidates = None
+        self.cell[i] = UNBOUNDED if node.parent is None else node.bounds
+        self.mid[i] = LEAF if node.children is None else node.center
+
+    def detach(self, i: int):
+        node = self.node_of[i]
+        node.bodys.discard(i)
+        while node is not None:
+            node.count -= 1
+            node = node.parent
+
+    def subdivide(self, node: QuadNode):
+        x, y, depth, code = node.x, node.y, node.depth + 1, node.code * 4
+        w = node.w / 2
+        h = node.h / 2
+        node.children = [self.node(x, y, w, h, depth, node, code), self.node(x + w, y, w, h, depth, node, code + 1),
+                         self.node(x, y + h, w, h, depth, node, code + 2),
+                         self.node(x + w, y + h, w, h, depth, node, code + 3)]
+        for i in list(node.bodys):
+            aabb = self.aabb(i)
+            for child in node.children:
+                if child.contains(aabb):
+                    node.bodys.discard(i)
+                    child.count += 1
+                    self.store(child, i)
+                    break
+            else:
+                self.store(node, i)
+
+    def merge(self, node: QuadNode):
+        while node is not None:
+            if node.children is not None and node.count <= self.capacity:
+                self.collapse(node)
+                for i in node.bodys:
+                    self.store(node, i)
+            node = node.parent
+
+    def collapse(self, node: QuadNode):
+        for child in node.children:
+            if child.children is not None:
+                self.collapse(child)
+            node.bodys.update(child.bodys)
+            self.pool.append(child)
+        node.children = None
+
+    def clear(self):
+        if self.root.children is not None:
+            self.collapse(self.root)
+        self.root = self.node(*self.boundary, 0, None, 0)
+        self.node_of = []
+        self.candidates = None
+
+    def pairs(self):
+        if self.candidates is None:
+            self.candidates = self.layout()
+        a, b = self.candidates
+        if len(a) == 0:
+            return NO_PAIRS
+        return overlapping_pairs(a, b, self.lo, self.hi)
+
+    def layout(self):
+        n = len(self.node_of)
+        if n < 2:
+            return NO_PAIRS
+        # sorted by node, every body's candidates, later bodies of its node and the whole subtree, are contiguous
+        order = np.argsort(self.key[:n], kind="stable")
+        position = np.arange(n)
+        reach = np.searchsorted(self.key[order], self.end[order])
+        counts = reach - position - 1
+        a = np.repeat(position, counts)
+        b = np.arange(len(a)) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(position + 1, counts)
+        return order[a], order[b]
 
-        self.northWest = None
-        self.northEast = None
-        self.southWest = None
-        self.southEast = None
-
-        for body in _bodys:
-            self.insert(body)
-
-    def subdivide(self):
-        x = self.boundary.x
-        y = self.boundary.y
-        w = self.boundary.w / 2
-        h = self.boundary.h / 2
-
-        self.northWest = QuadTree(self.capacity, pygame.Rect(
-            x, y, w, h), self.bodys)
-        self.northEast = QuadTree(self.capacity, pygame.Rect(
-            x + w, y, w, h), self.bodys)
-        self.southWest = QuadTree(self.capacity, pygame.Rect(
-            x, y + h, w, h), self.bodys)
-        self.southEast = QuadTree(self.capacity, pygame.Rect(
-            x + w, y + h, w, h), self.bodys)
-
-    def insert(self, body: Body):
-        if not self.boundary.colliderect(body.rect):
-            return False
-
-        if len(self.bodys) < self.capacity and self.northWest == None:
-            self.bodys.append(body)
-            return True
-        else:
-            if self.northWest == None:
-                self.subdivide()
-            if self.northWest.insert(body):
-                return True
-            if self.northEast.insert(body):
-                return True
-            if self.southWest.insert(body):
-                return True
-            if self.southEast.insert(body):
-                return True
-
-    def query_range(self, range: pygame.Rect):
-        found = []
-        if not self.boundary.colliderect(range):
-            return found
-        for body in self.bodys:
-            if range.colliderect(body.rect):
-                found.append(body)
-        if self.northWest != None:
-            found += self.northWest.query_range(range)
-            found += self.northEast.query_range(range)
-            found += self.southWest.query_range(range)
-            found += self.southEast.query_range(range)
-        return found
-
-    def draw(self, screen: pygame.Surface):
-        pygame.draw.rect(screen, self.color, self.boundary, 1)
-        if self.northWest is not None:
-            self.northWest.draw(screen)
-            self.northEast.draw(screen)
-            self.southWest.draw(screen)
-            self.southEast.draw(screen)
\ No newline at end of file
+    def draw(self, screen: 'pygame.Surface'):
+        import pygame
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            pygame.draw.rect(screen, self.color, (node.x, node.y, node.w, node.h), 1)
+            if node.children is not None:
+                stack.extend(node.children)
@@ -0,0 +1,120 @@
+import numpy as np
+import pygame
+from constants import BACKGROUND_COLOR
+
+WHITE = pygame.color.Color("white")
+RED = pygame.color.Color("red")
+# radii are drawn to the nearest half pixel, so random float radii still share a few sprites
+SPRITE_STEP = 0.5
+MAX_SPRITES = 256
+
+
+def chains(a: np.ndarray, b: np.ndarray):
+    # split an edge list into as few polylines as possible, starting from odd vertices
+    neighbours = {}
+    for i, j in zip(a.tolist(), b.tolist()):
+        neighbours.setdefault(i, []).append(j)
+        neighbours.setdefault(j, []).append(i)
+    used = set()
+    starts = [v for v, n in neighbours.items() if len(n) % 2] + list(neighbours)
+    paths = []
+    for start in starts:
+        while True:
+            path = [start]
+            current = start
+            while True:
+                for other in neighbours[current]:
+                    edge = (min(current, other), max(current, other))
+                    if edge not in used:
+                        used.add(edge)
+                        path.append(other)
+                        current = other
+                        break
+                else:
+                    break
+            if len(path) < 2:
+                break
+            paths.append(path)
+    return paths
+
+
+class Renderer:
+    def __init__(self):
+        self.sprites = {}
+        self.paths = {}
+
+    def sprite(self, radius: float, static: bool):
+        key = (radius, static)
+        if key not in self.sprites:
+            if len(self.sprites) >= MAX_SPRITES:
+                # evict the oldest sprite
+                del self.sprites[next(iter(self.sprites))]
+            size = int(np.ceil(radius)) * 2 + 1
+            # a colour key blits several times faster than per-pixel alpha
+            surface = pygame.Surface((size, size))
+            surface.set_colorkey((0, 0, 0))
+            pygame.draw.circle(surface, RED if static else WHITE,
+                               (size / 2, size / 2), radius)
+            self.sprites[key] = surface
+        return self.sprites[key]
+
+    def draw(self, screen: pygame.Surface, world, positions: np.ndarray):
+        screen.fill(BACKGROUND_COLOR)
+        view = np.array(screen.get_rect())
+        view = (view[:2], view[:2] + view[2:])
+        self.draw_bodys(screen, world, positions, view)
+        self.draw_edges(screen, world.spring_network, positions, view)
+        self.draw_edges(screen, world.bond_network, positions, view)
+        for softbody in world.soft_bodys:
+            softbody.draw(screen, positions)
+
+    def draw_bodys(self, screen: pygame.Surface, world, positions: np.ndarray, view: tuple):
+        particles = world.particles
+        n = particles.count
+        radius = particles.radius[:n]
+        static = particles.static[:n]
+        visible = particles.show[:n] & (positions + radius[:, None] >= view[0]).all(axis=1) & \
+            (positions - radius[:, None] <= view[1]).all(axis=1)
+
+        with world.profiler.section("trajectory"):
+            for i in np.flatnonzero(visible & particles.show_trajectory[:n] & ~static).tolist():
+                points = world.bodys[i].get_trajectory()
+                if len(points) > 1:
+                    pygame.draw.aalines(screen, WHITE, False, points.tolist())
+
+        rounded = np.round(radius / SPRITE_STEP) * SPRITE_STEP
+        for flag in (False, True):
+            group = np.flatnonzero(visible & (static == flag))
+            for size in np.unique(rounded[group]).tolist():
+                sprite = self.sprite(size, flag)
+                offset = sprite.get_width() / 2
+                points = positions[group[rounded[group] == size]] - offset
+                screen.blits([(sprite, point) for point in points.tolist()], False)
+
+        velocity = particles.velocity[:n]
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        arrows = np.flatnonzero(visible & (radius > 7) & (speed > 0))
+        tips = positions[arrows] + velocity[arrows] / speed[arrows, None] * radius[arrows, None]
+        for start, end in zip(positions[arrows].tolist(), tips.tolist()):
+            pygame.draw.line(screen, RED, start, end)
+
+    def draw_edges(self, screen: pygame.Surface, network, positions: np.ndarray, view: tuple):
+        cached = self.paths.get(network)
+        if cached is None or cached[0] != network.version:
+            shown = network.show[:network.count]
+            paths = chains(network.a[:network.count][shown], network.b[:network.count][shown])
+            order = np.array([i for path in paths for i in path], dtype=np.intp)
+            starts = np.cumsum([0] + [len(path) for path in paths[:-1]]).astype(np.intp)
+            cached = (network.version, order, starts)
+            self.paths[network] = cached
+        _, order, starts = cached
+        if len(order) == 0:
+            return
+        points = positions[order]
+        lo = np.minimum.reduceat(points, starts)
+        hi = np.maximum.reduceat(points, starts)
+        visible = ((hi >= view[0]) & (lo <= view[1])).all(axis=1)
+        ends = np.append(starts[1:], len(order))
+        points = points.tolist()
+        for start, end in zip(starts[visible].tolist(), ends[visible].tolist()):
+            pygame.draw.aalines(screen, WHITE, False, points[start:end])
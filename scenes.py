@@ -0,0 +1,91 @@
+import numpy as np
+from vector import Vector2
+from physics import Body, Wire, RectangleSoftBody, PressuredCircleSoftBody
+
+
+def demo(world):
+    Wire(world, Vector2(100, 200), Vector2(400, 300), 30)
+    RectangleSoftBody(world, Vector2(800, 300), 300, 200, (12, 9))
+    PressuredCircleSoftBody(world, Vector2(600, 300), 60, 60)
+
+
+def wire(world, segments: int):
+    width, height = world.bounds
+    Wire(world, Vector2(width * 0.05, height * 0.3),
+         Vector2(width * 0.95, height * 0.3), segments)
+
+
+def rectangle(world, columns: int, rows: int):
+    width, height = world.bounds
+    RectangleSoftBody(world, Vector2(width * 0.1, height * 0.1),
+                      width * 0.8, height * 0.6, (columns, rows))
+
+
+def pressured_circle(world, segments: int):
+    width, height = world.bounds
+    PressuredCircleSoftBody(world, Vector2(width / 2, height / 2),
+                            segments, segments)
+
+
+def pile(world, count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    width, height = world.bounds
+    radius = rng.uniform(2, 6, count)
+    position = rng.uniform((10, 10), (width - 10, height - 10), (count, 2))
+    velocity = rng.normal(0, 20, (count, 2))
+    for i in range(count):
+        body = Body(world, Vector2(position[i].tolist()), 1, radius[i].item(), 0.5)
+        body.velocity = Vector2(velocity[i].tolist())
+
+
+def level(world, count: int, seed: int = 0):
+    # slanted ledges made of static bodies with a pile falling through them
+    width, height = world.bounds
+    for row in range(count // 100):
+        y = height * (row + 1) / (count // 100 + 1)
+        for x in np.linspace(width * 0.05, width * 0.95, 100).tolist():
+            slope = 20 if row % 2 else -20
+            Body(world, Vector2(x, y + slope * x / width), 1, 3, 0.5, static=True)
+    pile(world, count // 4, seed)
+
+
+def bullets(world, count: int, seed: int = 0):
+    # small fast bodies fired at a wall one body thick, they tunnel through it without ccd
+    rng = np.random.default_rng(seed)
+    width, height = world.bounds
+    for y in np.arange(height * 0.1, height * 0.9, 6).tolist():
+        Body(world, Vector2(width / 2, y), 1, 3, 0.5, static=True)
+    for y in rng.uniform(height * 0.2, height * 0.8, count).tolist():
+        body = Body(world, Vector2(width * 0.1, y), 1, 2, 0.5)
+        body.velocity = Vector2(3000, 0)
+
+
+def heap(world, count: int, seed: int = 0):
+    # bodies packed closer than their diameter at the bottom, so nearly every neighbour is a contact
+    rng = np.random.default_rng(seed)
+    width, height = world.bounds
+    columns = int((width - 20) // 9)
+    i = np.arange(count)
+    x = 15 + (i % columns) * 9 + rng.uniform(-0.5, 0.5, count)
+    y = height - 15 - (i // columns) * 9 + rng.uniform(-0.5, 0.5, count)
+    for position in np.stack((x, y), axis=1).tolist():
+        Body(world, Vector2(position), 1, 5, 0.5)
+
+
+# name -> (world bounds, build(world, seed))
+SCENES = {
+    "demo": ((1300, 700), lambda world, seed: demo(world)),
+    "wire-100": ((1300, 700), lambda world, seed: wire(world, 100)),
+    "wire-1000": ((6500, 700), lambda world, seed: wire(world, 1000)),
+    "rectangle-12x9": ((1300, 700), lambda world, seed: rectangle(world, 12, 9)),
+    "rectangle-24x18": ((1300, 700), lambda world, seed: rectangle(world, 24, 18)),
+    "rectangle-48x36": ((2600, 1400), lambda world, seed: rectangle(world, 48, 36)),
+    "circle-60": ((1300, 700), lambda world, seed: pressured_circle(world, 60)),
+    "circle-240": ((1300, 700), lambda world, seed: pressured_circle(world, 240)),
+    "pile-1000": ((1300, 700), lambda world, seed: pile(world, 1000, seed)),
+    "pile-5000": ((2600, 1400), lambda world, seed: pile(world, 5000, seed)),
+    "level-2000": ((1300, 700), lambda world, seed: level(world, 2000, seed)),
+    "heap-4000": ((1300, 700), lambda world, seed: heap(world, 4000, seed)),
+    "heap-16000": ((2600, 1400), lambda world, seed: heap(world, 16000, seed)),
+    "bullets-200": ((1300, 700), lambda world, seed: bullets(world, 200, seed)),
+}
@@ -0,0 +1,163 @@
+import json
+import os
+import numpy as np
+from vector import Vector2
+from physics import Body, Spring, Bond, SoftBody
+from world import World, BROADPHASES
+
+
+def encode(value):
+    if isinstance(value, Vector2):
+        return {"vector": [value.x, value.y]}
+    if isinstance(value, (tuple, list)):
+        return {"tuple": [encode(item) for item in value]}
+    return value
+
+
+def decode(value):
+    if isinstance(value, dict) and "vector" in value:
+        return Vector2(value["vector"])
+    if isinstance(value, dict) and "tuple" in value:
+        return tuple(decode(item) for item in value["tuple"])
+    return value
+
+
+def soft_body_types(base=SoftBody):
+    types = {base.__name__: base}
+    for subclass in base.__subclasses__():
+        types.update(soft_body_types(subclass))
+    return types
+
+
+def save(world: World, path: str, compress: bool = False):
+    arrays = {}
+    for name, array in world.particles.state().items():
+        arrays["body_" + name] = array
+    arrays["body_trajectory_drag"] = np.array([body.trajectory_drag for body in world.bodys], dtype=bool)
+    for prefix, network in (("spring_", world.spring_network), ("bond_", world.bond_network)):
+        for name, array in network.state().items():
+            arrays[prefix + name] = array
+
+    soft_bodys = []
+    members, springs = [], []
+    for softbody in world.soft_bodys:
+        # cached arrays are derived state and get rebuilt on the next step
+        attributes = {name: encode(value) for name, value in vars(softbody).items()
+                      if name not in ("world", "bodys", "springs") and not isinstance(value, np.ndarray)}
+        soft_bodys.append({"type": type(softbody).__name__, "attributes": attributes})
+        members.append([body.index for body in softbody.bodys])
+        springs.append([spring.index for spring in softbody.springs])
+    arrays["soft_members"] = np.array([i for group in members for i in group], dtype=np.intp)
+    arrays["soft_member_counts"] = np.array([len(group) for group in members], dtype=np.intp)
+    arrays["soft_springs"] = np.array([i for group in springs for i in group], dtype=np.intp)
+    arrays["soft_spring_counts"] = np.array([len(group) for group in springs], dtype=np.intp)
+
+    broadphase = next(name for name, type in BROADPHASES.items() if type is world.broadphase_type)
+    meta = {"bounds": world.bounds, "temperature": world.temperature, "broadphase": broadphase,
+            "solver_iterations": world.solver_iterations, "backend": world.backend, "islands": world.islands,
+            "sleeping": world.sleeping, "ccd": world.ccd,
+            "broadphase_options": world.broadphase_options, "soft_bodys": soft_bodys}
+    arrays["meta"] = np.array(json.dumps(meta))
+    (np.savez_compressed if compress else np.savez)(path, **arrays)
+
+
+def load(path: str, **options) -> World:
+    with np.load(path) as data:
+        data = dict(data)
+    meta = json.loads(data["meta"].item())
+    options = {"broadphase": meta["broadphase"], "solver_iterations": meta["solver_iterations"],
+               "temperature": meta["temperature"], "backend": meta["backend"], "sleeping": meta["sleeping"],
+               "ccd": meta["ccd"], **meta["broadphase_options"], **options}
+    world = World(tuple(meta["bounds"]), **options)
+    world.islands = meta["islands"]
+
+    bodys = []
+    for i, drag in enumerate(data["body_trajectory_drag"].tolist()):
+        body = Body.__new__(Body)
+        body.world, body.particles, body.index = world, world.particles, i
+        body.trajectory, body.trajectory_state, body.trajectory_drag = None, None, drag
+        bodys.append(body)
+    world.particles.load({name[5:]: array for name, array in data.items() if name.startswith("body_")}, bodys)
+    for body in bodys:
+        body.key = world.particles.key(body.index)
+
+    for prefix, network, type in (("spring_", world.spring_network, Spring), ("bond_", world.bond_network, Bond)):
+        state = {name[len(prefix):]: array for name, array in data.items() if name.startswith(prefix)}
+        edges = []
+        for i, (a, b) in enumerate(zip(state["a"].tolist(), state["b"].tolist())):
+            edge = type.__new__(type)
+            edge.world, edge.network, edge.index = world, network, i
+            edge.body1, edge.body2 = bodys[a], bodys[b]
+            edges.append(edge)
+        network.load(state, edges)
+
+    types = soft_body_types()
+    members = np.split(data["soft_members"], np.cumsum(data["soft_member_counts"])[:-1])
+    springs = np.split(data["soft_springs"], np.cumsum(data["soft_spring_counts"])[:-1])
+    for entry, group, links in zip(meta["soft_bodys"], members, springs):
+        softbody = types[entry["type"]].__new__(types[entry["type"]])
+        SoftBody.__init__(softbody, world)
+        for name, value in entry["attributes"].items():
+            setattr(softbody, name, decode(value))
+        for i in group.tolist():
+            softbody.add_body(bodys[i])
+        for i in links.tolist():
+            softbody.add_spring(world.springs[i])
+    return world
+
+
+class Recorder:
+    # a keyframe snapshot whenever the structure changes, otherwise only the rows that moved
+    KEYFRAME, DELTA = 0, 1
+
+    def __init__(self, directory: str, keyframe_interval: int = 600):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.keyframe_interval = keyframe_interval
+        self.file = open(os.path.join(directory, "frames.npy"), "wb")
+        self.tick = 0
+        self.last_keyframe = None
+        self.signature = None
+        self.state = None
+
+    def record(self, world: World):
+        particles = world.particles
+        n = particles.count
+        state = np.hstack((particles.position[:n], particles.velocity[:n]))
+        signature = (id(world), particles.version, world.spring_network.version, world.bond_network.version,
+                     particles.static[:n].tobytes())
+        if signature != self.signature or self.tick - self.last_keyframe >= self.keyframe_interval:
+            save(world, os.path.join(self.directory, f"keyframe-{self.tick:08d}.npz"))
+            np.save(self.file, np.array((self.KEYFRAME, self.tick, n, world.temperature)))
+            self.signature = signature
+            self.last_keyframe = self.tick
+        else:
+            changed = np.flatnonzero((state != self.state).any(axis=1))
+            np.save(self.file, np.array((self.DELTA, self.tick, n, world.temperature)))
+            np.save(self.file, changed)
+            np.save(self.file, state[changed])
+        self.state = state
+        self.tick += 1
+
+    def close(self):
+        self.file.close()
+
+
+def replay(directory: str, **options):
+    world = None
+    with open(os.path.join(directory, "frames.npy"), "rb") as file:
+        while True:
+            try:
+                kind, tick, n, temperature = np.load(file).tolist()
+            except EOFError:
+                return
+            tick = int(tick)
+            if kind == Recorder.KEYFRAME:
+                world = load(os.path.join(directory, f"keyframe-{tick:08d}.npz"), **options)
+            else:
+                changed = np.load(file)
+                rows = np.load(file)
+                world.particles.position[changed] = rows[:, :2]
+                world.particles.velocity[changed] = rows[:, 2:]
+            world.temperature = temperature
+            yield tick, world
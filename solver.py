@@ -0,0 +1,102 @@
+import numpy as np
+
+
+def scatter_add(target: np.ndarray, index: np.ndarray, values: np.ndarray):
+    n = len(target)
+    target[:, 0] += np.bincount(index, values[:, 0], minlength=n)
+    target[:, 1] += np.bincount(index, values[:, 1], minlength=n)
+
+
+def resolve_contacts(particles, a: np.ndarray, b: np.ndarray, iterations: int = 1) -> int:
+    if len(a) == 0:
+        return 0
+    n = particles.count
+    position = particles.position[:n]
+    velocity = particles.velocity[:n]
+    weight = np.where(particles.static[:n], 0, particles.inv_mass[:n])
+    total = weight[a] + weight[b]
+    moving = total > 0
+    a, b, total = a[moving], b[moving], total[moving]
+    weight_a = weight[a, None]
+    weight_b = weight[b, None]
+    radius = particles.radius[a] + particles.radius[b]
+    restitution = 1 + np.minimum(particles.elasticity[a], particles.elasticity[b])
+
+    contacts = 0
+    for _ in range(iterations):
+        delta = position[a] - position[b]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        touching = (distance < radius) & (distance > 0)
+        if not touching.any():
+            break
+        ta, tb = a[touching], b[touching]
+        wa, wb = weight_a[touching], weight_b[touching]
+        normal = delta[touching] / distance[touching, None]
+        contacts = contacts or len(ta)
+
+        # split corrections by inverse mass and average them over each body's contacts
+        shared = np.bincount(ta, minlength=n) + np.bincount(tb, minlength=n)
+        wa = wa / shared[ta, None]
+        wb = wb / shared[tb, None]
+        depth = (radius[touching] - distance[touching]) / total[touching]
+        correction = normal * depth[:, None]
+        scatter_add(position, ta, correction * wa)
+        scatter_add(position, tb, -correction * wb)
+
+        approach = ((velocity[ta] - velocity[tb]) * normal).sum(axis=1)
+        approach = np.minimum(approach, 0)
+        j = -restitution[touching] * approach / total[touching]
+        impulse = normal * j[:, None]
+        scatter_add(velocity, ta, impulse * wa)
+        scatter_add(velocity, tb, -impulse * wb)
+    return contacts
+
+
+def time_of_impact(delta: np.ndarray, motion: np.ndarray, reach: np.ndarray) -> np.ndarray:
+    # first t in [0, 1] with |delta + t * motion| = reach, inf when the circles do not meet
+    a = (motion ** 2).sum(axis=1)
+    b = (delta * motion).sum(axis=1)
+    c = (delta ** 2).sum(axis=1) - reach ** 2
+    discriminant = b * b - a * c
+    # pairs already touching at the start were handled by the discrete solver
+    hit = (c > 0) & (b < 0) & (discriminant >= 0)
+    t = np.full(len(a), np.inf)
+    t[hit] = (-b[hit] - np.sqrt(discriminant[hit])) / a[hit]
+    t[t > 1] = np.inf
+    return t
+
+
+def resolve_sweeps(particles, start: np.ndarray, a: np.ndarray, b: np.ndarray):
+    # rewind every body to its earliest impact along its step, then remove the approaching velocity
+    n = particles.count
+    position = particles.position[:n]
+    velocity = particles.velocity[:n]
+    weight = np.where(particles.static[:n], 0, particles.inv_mass[:n])
+    motion = position - start
+    radius = particles.radius[a] + particles.radius[b]
+    t = time_of_impact(start[a] - start[b], motion[a] - motion[b], radius)
+    hit = np.isfinite(t) & (weight[a] + weight[b] > 0)
+    if not hit.any():
+        return a[hit], b[hit]
+    a, b, t = a[hit], b[hit], t[hit]
+    first = np.ones(n)
+    np.minimum.at(first, a, t)
+    np.minimum.at(first, b, t)
+    rewound = first < 1
+    position[rewound] = start[rewound] + motion[rewound] * first[rewound, None]
+
+    delta = position[a] - position[b]
+    distance = np.hypot(delta[:, 0], delta[:, 1])
+    valid = distance > 0
+    a, b, delta, distance = a[valid], b[valid], delta[valid], distance[valid]
+    normal = delta / distance[:, None]
+    total = weight[a] + weight[b]
+    shared = np.bincount(a, minlength=n) + np.bincount(b, minlength=n)
+    wa = (weight[a] / shared[a])[:, None]
+    wb = (weight[b] / shared[b])[:, None]
+    restitution = 1 + np.minimum(particles.elasticity[a], particles.elasticity[b])
+    approach = np.minimum(((velocity[a] - velocity[b]) * normal).sum(axis=1), 0)
+    impulse = normal * (-restitution * approach / total)[:, None]
+    scatter_add(velocity, a, impulse * wa)
+    scatter_add(velocity, b, -impulse * wb)
+    return a, b
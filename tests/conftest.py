@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import benchmark
+
+
+@pytest.fixture
+def scene():
+    # a world built from scenes.SCENES and stepped for a number of ticks
+    def build(name: str, ticks: int = 0, **options):
+        world = benchmark.build(name, 0, profile=False, **options)
+        for _ in range(ticks):
+            world.step(1 / 60)
+        return world
+    return build
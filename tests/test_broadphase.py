@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from world import BROADPHASES
+
+
+def brute_force(world, deltatime: float):
+    # every overlapping pair of boxes, swept the same way as World.candidates, except two resting bodies
+    particles = world.particles
+    n = particles.count
+    lo, hi = particles.bounds()
+    velocity = particles.velocity[:n]
+    reach = np.hypot(velocity[:, 0], velocity[:, 1])[world.fast, None] * deltatime
+    lo[world.fast] -= reach
+    hi[world.fast] += reach
+    resting = particles.static[:n] | particles.asleep[:n]
+    a, b = np.triu_indices(n, 1)
+    hit = (lo[a] <= hi[b]).all(axis=1) & (lo[b] <= hi[a]).all(axis=1) & ~(resting[a] & resting[b])
+    return set(zip(a[hit].tolist(), b[hit].tolist()))
+
+
+@pytest.mark.parametrize("broadphase", BROADPHASES)
+@pytest.mark.parametrize("name, ticks", [("demo", 400), ("bullets-200", 100)])
+def test_broadphase_matches_brute_force(scene, broadphase, name, ticks):
+    # demo covers springs, static anchors, sleeping and waking; bullets-200 covers swept boxes
+    world = scene(name, broadphase=broadphase)
+    rng = np.random.default_rng(0)
+    asleep = swept = 0
+    for tick in range(ticks):
+        if tick % 50 == 25:
+            world.remove_body(world.bodys[int(rng.integers(world.particles.count))])
+        a, b = world.candidates(1 / 60)
+        assert set(zip(np.minimum(a, b).tolist(), np.maximum(a, b).tolist())) == brute_force(world, 1 / 60)
+        swept += world.fast.sum()
+        world.step(1 / 60)
+        asleep += world.particles.asleep[:world.particles.count].sum()
+    assert asleep if name == "demo" else swept
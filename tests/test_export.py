@@ -0,0 +1,17 @@
+import numpy as np
+import export
+
+
+def test_only_pressured_bodies_export_area(tmp_path, scene):
+    world = scene("demo")
+    exporter = export.Exporter(str(tmp_path), chunk=4)
+    for _ in range(10):
+        world.step(1 / 60)
+        exporter.record(world)
+    exporter.close()
+    rows = export.load(str(tmp_path))["soft_bodys"]
+    assert len(rows) == 10 * len(world.soft_bodys)
+    # demo: wire, rectangle, pressured circle
+    kind = rows[:, 1].astype(int)
+    assert np.isnan(rows[kind < 2, 4:]).all()
+    assert (rows[kind == 2, 4:] > 0).all()
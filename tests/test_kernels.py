@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+import kernels
+
+KERNELS = ("integrate_kernel", "contacts_kernel", "impulses_kernel")
+SCENES_TICKS = [("demo", 120), ("pile-1000", 60), ("circle-60", 120)]
+
+
+@pytest.fixture(params=["numba", "python"])
+def compiled(request, monkeypatch):
+    if request.param == "numba":
+        if not kernels.AVAILABLE:
+            pytest.skip("numba is not installed")
+    else:
+        # without numba the kernels are already plain python, with it run their python source
+        for name in KERNELS:
+            kernel = getattr(kernels, name)
+            monkeypatch.setattr(kernels, name, getattr(kernel, "py_func", kernel))
+        monkeypatch.setattr(kernels, "AVAILABLE", True)
+    return request.param
+
+
+@pytest.mark.parametrize("name, ticks", SCENES_TICKS)
+def test_kernels_match_numpy_bit_for_bit(compiled, scene, name, ticks):
+    world = scene(name, ticks, backend="numpy")
+    jit = scene(name, ticks, backend="numba")
+    assert jit.backend == "numba"
+    n = world.particles.count
+    assert np.array_equal(world.particles.position[:n], jit.particles.position[:n])
+    assert np.array_equal(world.particles.velocity[:n], jit.particles.velocity[:n])
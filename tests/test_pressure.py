@@ -0,0 +1,12 @@
+import math
+from physics import PressuredCircleSoftBody
+from vector import Vector2
+from world import World
+
+
+def test_new_circle_is_measured():
+    world = World(profile=False)
+    circle = PressuredCircleSoftBody(world, Vector2(600, 300), 60, 60)
+    assert circle.calculate_pressure() > 0
+    # a regular 60-gon inscribed in the circle
+    assert math.isclose(circle.area, 30 * 60 ** 2 * math.sin(2 * math.pi / 60))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from physics import Body
+from vector import Vector2
+from world import World
+from constants import SLEEP_MARGIN
+
+
+@pytest.mark.parametrize("name, ticks", [("rectangle-12x9", 600), ("wire-100", 2400)])
+def test_sleeping_bodies_keep_zero_velocity(scene, name, ticks):
+    world = scene(name, ticks)
+    particles = world.particles
+    n = particles.count
+    asleep = particles.asleep[:n]
+    assert asleep.any()
+    assert not particles.velocity[:n][asleep].any()
+
+
+def test_waking_does_not_throw_bodies(scene):
+    world = scene("rectangle-12x9", 600)
+    n = world.particles.count
+    before = world.particles.position[:n].copy()
+    world.wake()
+    world.step(1 / 60)
+    assert np.abs(world.particles.position[:n] - before).max() < 1
+
+
+@pytest.mark.parametrize("y, vy", [(300, -4), (300, -20), (600, 0)])
+def test_bodies_only_sleep_on_the_floor(y, vy):
+    # near the top of a toss or a bounce a body stays slow and close by for a whole calm window
+    world = World(profile=False)
+    body = Body(world, Vector2(600, y), 10, 10, 0.5)
+    body.velocity = Vector2(0, vy)
+    floor = world.bounds[1] - body.radius - SLEEP_MARGIN
+    for _ in range(3000):
+        world.step(1 / 60)
+        if world.particles.asleep[0]:
+            break
+    assert world.particles.asleep[0]
+    assert body.position.y >= floor
+
+
+def anchored_neighbour(world):
+    anchor = next(body for body in world.bodys if body.static)
+    edge = next(iter(world.spring_network.links[anchor]))
+    return anchor, edge.body2 if edge.body1 is anchor else edge.body1
+
+
+@pytest.mark.parametrize("release", ["remove", "unpin"])
+def test_releasing_an_anchor_wakes_the_wire(scene, release):
+    world = scene("wire-100", 2400)
+    anchor, neighbour = anchored_neighbour(world)
+    assert world.particles.asleep[neighbour.index]
+    before = neighbour.position
+    if release == "remove":
+        world.remove_body(anchor)
+    else:
+        anchor.static = False
+    for _ in range(60):
+        world.step(1 / 60)
+        particles = world.particles
+        n = particles.count
+        assert not particles.velocity[:n][particles.asleep[:n]].any()
+    assert neighbour.position.distance_to(before) > 10
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+import snapshot
+
+
+@pytest.mark.parametrize("name, options", [("demo", {}), ("demo", {"sleeping": False}),
+                                           ("bullets-200", {"ccd": False})])
+def test_restored_world_steps_like_the_original(tmp_path, scene, name, options):
+    world = scene(name, 50, **options)
+    path = str(tmp_path / "scene.npz")
+    snapshot.save(world, path)
+    restored = snapshot.load(path, profile=False)
+    for _ in range(100):
+        world.step(1 / 60)
+        restored.step(1 / 60)
+    n = world.particles.count
+    assert np.array_equal(world.particles.position[:n], restored.particles.position[:n])
+    assert np.array_equal(world.particles.velocity[:n], restored.particles.velocity[:n])
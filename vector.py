@@ -0,0 +1,68 @@
+import math
+from numbers import Real
+
+
+class Vector2:
+    # the part of pygame.math.Vector2 the physics core uses, so it imports without pygame
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0.0, y=None):
+        if y is None:
+            x, y = x
+        self.x = float(x)
+        self.y = float(y)
+
+    def __repr__(self):
+        return f"Vector2({self.x}, {self.y})"
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __getitem__(self, i: int):
+        return (self.x, self.y)[i]
+
+    def __eq__(self, other):
+        try:
+            return len(other) == 2 and self.x == other[0] and self.y == other[1]
+        except TypeError:
+            return NotImplemented
+
+    def __add__(self, other):
+        return Vector2(self.x + other[0], self.y + other[1])
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Vector2(self.x - other[0], self.y - other[1])
+
+    def __rsub__(self, other):
+        return Vector2(other[0] - self.x, other[1] - self.y)
+
+    def __mul__(self, other):
+        if isinstance(other, Real):
+            return Vector2(self.x * other, self.y * other)
+        return self.dot(other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: float):
+        return Vector2(self.x / other, self.y / other)
+
+    def __neg__(self):
+        return Vector2(-self.x, -self.y)
+
+    def dot(self, other):
+        return self.x * other[0] + self.y * other[1]
+
+    def length(self):
+        return math.hypot(self.x, self.y)
+
+    def distance_to(self, other):
+        return math.hypot(self.x - other[0], self.y - other[1])
+
+    def normalize(self):
+        return self / self.length()
@@ -0,0 +1,251 @@
+import warnings
+import numpy as np
+from quadtree import QuadTree
+from broadphase import UniformGrid, SweepAndPrune, Selection, StaticIndex
+from particles import ParticleStore
+from network import SpringNetwork, BondNetwork
+from solver import resolve_contacts, resolve_sweeps
+from profiler import Profiler
+from islands import components
+from constants import SOLVER_ITERATIONS, SLEEP_SPEED, SLEEP_DRIFT, SLEEP_TICKS, SLEEP_MARGIN, CCD_TRAVEL
+
+BACKENDS = ("numpy", "numba")
+BROADPHASES = {"quadtree": QuadTree, "grid": UniformGrid, "sap": SweepAndPrune}
+
+
+class World:
+    def __init__(self, bounds: tuple = (1300, 700), broadphase: str = "grid", solver_iterations: int = SOLVER_ITERATIONS,
+                 temperature: float = 90, profile: bool = True, backend: str = "numpy", sleeping: bool = True,
+                 ccd: bool = True, **broadphase_options):
+        store, springs, self.resolve = ParticleStore, SpringNetwork, resolve_contacts
+        if backend == "numba":
+            import kernels
+            if kernels.AVAILABLE:
+                store, springs, self.resolve = kernels.JitParticleStore, kernels.JitSpringNetwork, kernels.resolve_contacts
+            else:
+                warnings.warn("numba is not installed, using the numpy backend")
+                backend = "numpy"
+        elif backend != "numpy":
+            raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+        self.particles = store()
+        self.bodys = self.particles.bodys
+        self.spring_network = springs()
+        self.springs = self.spring_network.edges
+        self.bond_network = BondNetwork()
+        self.bonds = self.bond_network.edges
+        self.soft_bodys = []
+        self.memberships = {}
+        self.temperature = temperature
+        self.sleeping = sleeping
+        # sweep every body that moves far enough to skip a contact, not only the ones flagged for it
+        self.ccd = ccd
+        self.fast = np.zeros(0, dtype=bool)
+        self.islands = 0
+        self.profiler = Profiler(enabled=profile)
+        self.solver_iterations = solver_iterations
+        self.broadphase_type = BROADPHASES[broadphase]
+        self.broadphase_options = broadphase_options
+        self.bounds = tuple(bounds)
+        self.broadphase = self.broadphase_type(
+            (0, 0, *self.bounds), **broadphase_options)
+        self.static_index = StaticIndex()
+        self.moving = 0
+
+    def resize(self, bounds: tuple):
+        if tuple(bounds) == self.bounds:
+            return
+        self.bounds = tuple(bounds)
+        self.broadphase = self.broadphase_type(
+            (0, 0, *self.bounds), **self.broadphase_options)
+        self.moving = 0
+
+    def get(self, key: tuple):
+        i = self.particles.resolve(key)
+        return self.bodys[i] if i >= 0 else None
+
+    def remove_body(self, body):
+        i = body.index
+        if i < 0:
+            return
+        self.disturb(i)
+        last = self.particles.count - 1
+        moved = self.bodys[last]
+        for network in (self.spring_network, self.bond_network):
+            for edge in network.remove_body(body, moved, i, last):
+                self.unlink(edge)
+        self.unlink(body)
+        for softbody in self.memberships.get(moved, ()):
+            softbody.members = None
+        self.particles.remove(i)
+        body.index = -1
+
+    def unlink(self, item):
+        for softbody in self.memberships.pop(item, ()):
+            softbody.unlink(item)
+
+    def wake(self, i=None):
+        particles = self.particles
+        n = particles.count
+        asleep = particles.asleep[:n]
+        if i is not None:
+            i = np.atleast_1d(i)
+            i = i[asleep[i]]
+            if len(i) == 0:
+                return
+            asleep = asleep & np.isin(particles.island[:n], particles.island[i])
+        particles.asleep[:n][asleep] = False
+        particles.rest[:n][asleep] = 0
+
+    def disturb(self, i):
+        # whatever hangs on or leans against these bodies loses its support; a static body has no island of its own
+        particles = self.particles
+        n = particles.count
+        i = np.atleast_1d(i)
+        neighbours = [i]
+        for network in (self.spring_network, self.bond_network):
+            for body in map(self.bodys.__getitem__, i.tolist()):
+                for edge in network.links.get(body, ()):
+                    neighbours.append((network.a[edge.index], network.b[edge.index]))
+        position = particles.position[:n]
+        delta = position[:, None] - position[i]
+        reach = particles.radius[:n, None] + particles.radius[i] + SLEEP_MARGIN
+        neighbours.append(np.flatnonzero(((delta ** 2).sum(axis=2) < reach ** 2).any(axis=1)))
+        self.wake(np.concatenate(neighbours))
+
+    def touching(self, a: np.ndarray, b: np.ndarray, margin: float = 0):
+        position = self.particles.position
+        delta = position[a] - position[b]
+        reach = self.particles.radius[a] + self.particles.radius[b] + margin
+        return (delta ** 2).sum(axis=1) < reach ** 2
+
+    def wake_contacts(self, a: np.ndarray, b: np.ndarray):
+        particles = self.particles
+        asleep = particles.asleep
+        moving = ~(particles.static | asleep)
+        mixed = (asleep[a] & moving[b]) | (moving[a] & asleep[b])
+        if mixed.any():
+            a, b = a[mixed], b[mixed]
+            hit = self.touching(a, b)
+            self.wake(np.concatenate((a[hit], b[hit])))
+
+    def candidates(self, deltatime: float):
+        # moving bodies go through the broadphase, resting ones (static or asleep) sit in the static index
+        particles = self.particles
+        n = particles.count
+        lo, hi = particles.bounds()
+        resting = particles.static[:n] | particles.asleep[:n]
+        velocity = particles.velocity[:n]
+        travel = np.hypot(velocity[:, 0], velocity[:, 1]) * deltatime
+        fast = particles.ccd[:n]
+        if self.ccd:
+            fast = fast | (travel > CCD_TRAVEL * particles.radius[:n])
+        self.fast = fast & ~resting
+        if self.fast.any():
+            # swept boxes, grown both ways since the contact solver may still turn the body around
+            reach = travel[self.fast, None]
+            lo[self.fast] -= reach
+            hi[self.fast] += reach
+        moving = np.flatnonzero(~resting)
+        if len(moving) < self.moving:
+            # the broadphase numbers the moving bodies from 0 and cannot shrink in place
+            self.broadphase.clear()
+        self.moving = len(moving)
+        self.broadphase.update(Selection(lo[moving], hi[moving]))
+        a, b = self.broadphase.pairs()
+        resting = np.flatnonzero(resting)
+        self.static_index.update(resting, lo[resting], hi[resting])
+        c, d = self.static_index.query(moving, lo[moving], hi[moving])
+        return np.concatenate((moving[a], c)), np.concatenate((moving[b], d))
+
+    def sweep(self, start: np.ndarray, a: np.ndarray, b: np.ndarray):
+        swept = self.fast[a] | self.fast[b]
+        a, b = resolve_sweeps(self.particles, start, a[swept], b[swept])
+        self.profiler.count("impacts", len(a))
+        if self.sleeping:
+            self.wake(np.concatenate((a, b)))
+
+    def settle(self, a: np.ndarray, b: np.ndarray):
+        # islands join awake bodies through contacts, springs and bonds; static bodies only anchor them
+        particles = self.particles
+        n = particles.count
+        active = ~(particles.static[:n] | particles.asleep[:n])
+        if not active.any():
+            return
+        springs, bonds = self.spring_network, self.bond_network
+        c = np.concatenate((springs.a[:springs.count], bonds.a[:bonds.count]))
+        d = np.concatenate((springs.b[:springs.count], bonds.b[:bonds.count]))
+        # an edge from an awake body keeps pulling on the other end, so its island has to wake up
+        asleep = particles.asleep[:n]
+        pulled = (asleep[c] & active[d]) | (active[c] & asleep[d])
+        if pulled.any():
+            self.wake(np.concatenate((c[pulled], d[pulled])))
+            active = ~(particles.static[:n] | asleep)
+        contact = self.touching(a, b, SLEEP_MARGIN)
+        a = np.concatenate((a[contact], c))
+        b = np.concatenate((b[contact], d))
+        linked = active[a] & active[b]
+        island = components(n, a[linked], b[linked])
+
+        mass = particles.mass[:n]
+        position = particles.position[:n]
+        velocity = particles.velocity[:n]
+        weight = np.bincount(island, mass * active, minlength=n)
+        energy = np.bincount(island, mass * (velocity ** 2).sum(axis=1) * active, minlength=n)
+        # jitter stays in place, slow sagging does not
+        drift = np.bincount(island, mass * ((position - particles.anchor[:n]) ** 2).sum(axis=1) * active, minlength=n)
+        # and only an island resting on something may fall asleep: the floor, a static body or a sleeping island
+        support = active & (position[:, 1] >= self.bounds[1] - particles.radius[:n] - SLEEP_MARGIN)
+        support[a[active[a] & ~active[b]]] = True
+        support[b[~active[a] & active[b]]] = True
+        supported = np.bincount(island, support, minlength=n) > 0
+        calm = (energy < weight * SLEEP_SPEED ** 2) & (drift < weight * SLEEP_DRIFT ** 2) & supported
+        rest = particles.rest[:n]
+        calm = active & calm[island]
+        rest[active] = np.where(calm[active], rest[active] + 1, 0)
+        restart = active & ~calm
+        particles.anchor[:n][restart] = position[restart]
+        ready = np.full(n, SLEEP_TICKS)
+        np.minimum.at(ready, island[active], rest[active])
+        falling = active & (ready[island] >= SLEEP_TICKS)
+        if not falling.any():
+            return
+        # sleeping islands keep their own ids, awake labels are recomputed every step
+        _, label = np.unique(island[falling], return_inverse=True)
+        particles.island[:n][falling] = self.islands + label
+        self.islands += int(label.max()) + 1
+        particles.asleep[:n] |= falling
+        velocity[falling] = 0
+
+    def bodys_at(self, point: tuple):
+        lo, hi = self.particles.bounds()
+        point = np.asarray(point, dtype=float)
+        return np.flatnonzero((lo <= point).all(axis=1) & (point < hi).all(axis=1))
+
+    def step(self, deltatime: float):
+        profiler = self.profiler
+        with profiler.section("broadphase"):
+            a, b = self.candidates(deltatime)
+            if self.sleeping:
+                self.wake_contacts(a, b)
+        profiler.count("pairs", len(a))
+        with profiler.section("collision"):
+            contacts = self.resolve(
+                self.particles, a, b, self.solver_iterations)
+        profiler.count("contacts", contacts)
+        with profiler.section("integration"):
+            start = self.particles.position[:self.particles.count].copy() if self.fast.any() else None
+            self.particles.update(deltatime, self.bounds)
+        if start is not None:
+            with profiler.section("ccd"):
+                self.sweep(start, a, b)
+        with profiler.section("springs"):
+            self.spring_network.update(self.particles, deltatime)
+        with profiler.section("bonds"):
+            self.bond_network.update(self.particles)
+        with profiler.section("pressure"):
+            for softbody in self.soft_bodys:
+                softbody.update(deltatime)
+        if self.sleeping:
+            with profiler.section("sleep"):
+                self.settle(a, b)